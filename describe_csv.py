@@ -4,8 +4,20 @@ import logging
 import re
 import os
 import hashlib
-import pickle
-from typing import Dict, Any, List
+import functools
+import sqlite3
+import threading
+import queue
+import time
+import atexit
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import blake3
+except ImportError:  # blake3 is optional; fall back to the stdlib BLAKE2 hash.
+    blake3 = None
 
 # --- Configuration ---
 # Configure logging to see the script's progress and any potential issues.
@@ -13,51 +25,413 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 # Directory for caching LLM responses to avoid redundant calls.
 CACHE_DIR = 'ollama_cache'
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# All cached responses live in a single SQLite table keyed by hash. Writes are
+# queued to a background thread and committed in bulk rather than once per entry.
+# Values are stored as plain UTF-8 text. CACHE_VERSION is kept in the database's
+# user_version; bump it whenever keys or values change format, and any older
+# entries are discarded on startup instead of being misread.
+CACHE_DB = os.path.join(CACHE_DIR, 'ollama_cache.db')
+CACHE_VERSION = 2
+_cache_lock = threading.Lock()
+_cache_conn = sqlite3.connect(CACHE_DB, check_same_thread=False)
+_cache_conn.execute('PRAGMA journal_mode=WAL')
+_cache_conn.execute('PRAGMA synchronous=NORMAL')
+if _cache_conn.execute('PRAGMA user_version').fetchone()[0] != CACHE_VERSION:
+    _cache_conn.execute('DROP TABLE IF EXISTS cache')
+    _cache_conn.execute(f'PRAGMA user_version = {CACHE_VERSION}')
+_cache_conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)')
+_cache_conn.commit()
+
+# Pending (key, value) cache writes, drained by the background writer thread,
+# which commits at most once every CACHE_COMMIT_INTERVAL seconds.
+_WRITE_Q: queue.Queue = queue.Queue()
+_WRITER_STOP = object()
+CACHE_COMMIT_INTERVAL = 5.0
+
+# In-process copy of cache entries already read or written during this run,
+# checked before touching the database.
+_MEM_CACHE: Dict[str, str] = {}
+
+# Descriptions of identifier-like columns ('StoreID', 'branch_id') are cached with
+# the column name swapped for this placeholder, so one entry can serve columns of
+# the same shape within a table.
+COLUMN_PLACEHOLDER = '<<COLUMN>>'
+
+# Columns described so far for a table are checkpointed to
+# CACHE_DIR/<table>.partial.json, so an interrupted run resumes where it stopped.
+# Fallback descriptions from failed LLM calls carry this marker and are never
+# checkpointed, so they are retried on the next run.
+FALLBACK_MARKER = 'LLM description generation failed'
+
+# Maximum number of columns marshaled into a single LLM prompt. Larger batches
+# save round-trips but make the response harder for the model to keep in order.
+BATCH_SIZE = 8
+
+# Number of LLM requests issued concurrently. Ollama serves parallel requests,
+# so keep this in line with the server's OLLAMA_NUM_PARALLEL setting.
+MAX_WORKERS = 8
+
+# Sample values are drawn from the first rows only; we need just 5 distinct
+# examples per column, not a full-column unique.
+SAMPLE_SCAN_ROWS = 200
+
+# Sample values are shown to the model as strings cut to this length, keeping
+# long text out of the prompt.
+SAMPLE_VALUE_MAX_CHARS = 40
+
+# Rows read from each CSV to infer dtypes and nullability. Reading a sample keeps
+# large files cheap, at the cost of estimating nullability: a column whose first
+# null appears after this many rows is reported as not nullable. Pass
+# sample_rows=None to generate_descriptions_from_csv to read the whole file.
+READ_SAMPLE_ROWS = 10_000
+
+# --- Response Patterns ---
+# Compiled once at import time; every LLM response is run through these.
+
+# Maps each markdown field label (lower-cased) to its key in the parsed output.
+# Handles both "Issues" and "Known Issues/Limitations" for flexibility.
+_SECTION_KEYS = {
+    'business purpose': 'business_purpose',
+    'data quality rules': 'data_quality_rules',
+    'example usage': 'example_usage',
+    'known issues/limitations': 'issues',
+    'issues': 'issues',
+}
+# A single alternation so each response is scanned once rather than once per field.
+# A field body also ends where the next field label starts on a new line, so
+# numbered ('1. **Business Purpose**: ...') or undashed labels are not swallowed.
+_SECTION_LABELS = r'(?:Business Purpose|Data Quality Rules|Example Usage|Known Issues/Limitations|Issues)'
+_SECTION_PATTERN = re.compile(
+    rf'\*\*({_SECTION_LABELS})\*\*:\s*(.*?)(?=\n-|\n\n|\n\s*(?:\d+\.\s*)?\*\*{_SECTION_LABELS}\*\*:|$)',
+    re.DOTALL | re.IGNORECASE
+)
+# Any bold '**Label**:' marker; column names inside these are never rewritten.
+_FIELD_LABEL_PATTERN = re.compile(r'(\*\*[^*\n]+\*\*:)')
+# Section headers in a batched response, e.g. '## COLUMN 3' or '### COLUMN 3: StoreID'.
+_COLUMN_HEADER_PATTERN = re.compile(r'^\s*#{2,3}\s*COLUMN\s+(\d+)\b[^\n]*$', re.MULTILINE | re.IGNORECASE)
+
+# --- Rule-Based Templates ---
+# Identifiers, dates and boolean flags are described from a fixed template
+# instead of an LLM call; the output matches the LLM's markdown layout.
+
+# 'ID' must start a word ('StoreID', 'store_ID', 'ID'), so 'PAID' or 'GRID' don't match.
+_ID_NAME_PATTERN = re.compile(r'(?:(?:^|_|[a-z])ID|[a-z]Id|(?:^|_)id)$')
+_DATE_NAME_PATTERN = re.compile(r'(?:_at|_date|_on|Date)$')
+_FLAG_NAME_PATTERN = re.compile(r'^(?:is_|has_|Is(?=[A-Z])|Has(?=[A-Z]))')
+# Dtype names of text columns: 'object' for NumPy-backed reads and for Arrow strings
+# (see _dtype_name), 'string'/'str' for pandas' own string dtypes.
+_STRING_DTYPES = ('object', 'string', 'str')
+# A flag-named column only counts as a flag if its samples look boolean.
+_FLAG_VALUES = {'true', 'false', '0', '1', '0.0', '1.0', 'y', 'n', 'yes', 'no'}
+_ISO_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?$')
+
+TEMPLATES = {
+    'identifier': (
+        "- **Business Purpose**: Uniquely identifies or references the record described by {column_name} in the {table_name} table.\n"
+        "- **Data Quality Rules**: Must conform to data type {data_type}; {null_rule}; values must match an existing key in the referenced entity.\n"
+        "- **Example Usage**: Used to join {table_name} to related tables and to count distinct records.\n"
+        "- **Known Issues/Limitations**: Orphaned or reused identifiers break joins; the value carries no business meaning on its own."
+    ),
+    'date': (
+        "- **Business Purpose**: Records the date or time associated with each record in the {table_name} table ({column_name}).\n"
+        "- **Data Quality Rules**: Must be a valid ISO 8601 date/time stored as {data_type}; {null_rule}.\n"
+        "- **Example Usage**: Used to filter, group and trend {table_name} records over time.\n"
+        "- **Known Issues/Limitations**: Time zones and mixed date formats may be inconsistent; future or placeholder dates can appear."
+    ),
+    'flag': (
+        "- **Business Purpose**: Flags whether the condition named by {column_name} holds for each record in the {table_name} table.\n"
+        "- **Data Quality Rules**: Must hold only true/false values (data type {data_type}); {null_rule}.\n"
+        "- **Example Usage**: Used to filter or segment {table_name} records by the flagged condition.\n"
+        "- **Known Issues/Limitations**: Null values are ambiguous between false and unknown; encodings such as Y/N or 1/0 may be mixed."
+    ),
+}
 
 # --- Helper Functions ---
 
+@functools.lru_cache(maxsize=4096)
 def _get_cache_key(prompt: str) -> str:
-    """Generate a unique MD5 hash for a given prompt to use as a cache key."""
-    return hashlib.md5(prompt.encode()).hexdigest()
+    """Generate a 128-bit BLAKE3 (or BLAKE2b) hash for a given prompt to use as a cache key."""
+    if blake3 is not None:
+        return blake3.blake3(prompt.encode()).hexdigest(length=16)
+    return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
 
-def _load_from_cache(cache_key: str) -> Any:
+def _load_from_cache(cache_key: str) -> Optional[str]:
     """Load a response from the cache if it exists."""
-    cache_file = os.path.join(CACHE_DIR, f'{cache_key}.pkl')
-    if os.path.exists(cache_file):
-        with open(cache_file, 'rb') as f:
-            return pickle.load(f)
-    return None
+    if cache_key in _MEM_CACHE:
+        return _MEM_CACHE[cache_key]
+    with _cache_lock:
+        row = _cache_conn.execute('SELECT value FROM cache WHERE key = ?', (cache_key,)).fetchone()
+    if row is None:
+        return None
+    _MEM_CACHE[cache_key] = row[0]
+    return row[0]
+
+def _save_to_cache(cache_key: str, response: str):
+    """Queue a response for the cache writer; it is visible to _load_from_cache immediately."""
+    _MEM_CACHE[cache_key] = response
+    _WRITE_Q.put((cache_key, response))
+
+def _writer_loop():
+    """Drain queued cache writes into SQLite, committing every CACHE_COMMIT_INTERVAL seconds."""
+    last_commit = time.monotonic()
+    while True:
+        try:
+            item = _WRITE_Q.get(timeout=CACHE_COMMIT_INTERVAL)
+        except queue.Empty:
+            item = None
+        if item is _WRITER_STOP:
+            _WRITE_Q.task_done()
+            return
+        try:
+            with _cache_lock:
+                if item is not None:
+                    _cache_conn.execute('INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)', item)
+                if time.monotonic() - last_commit >= CACHE_COMMIT_INTERVAL:
+                    _cache_conn.commit()
+                    last_commit = time.monotonic()
+        except sqlite3.Error as e:
+            logging.error(f"Error writing to cache: {e}")
+        finally:
+            if item is not None:
+                _WRITE_Q.task_done()
+
+def _flush_cache():
+    """Wait for queued cache writes to reach the database, then commit them."""
+    _WRITE_Q.join()
+    with _cache_lock:
+        _cache_conn.commit()
+
+def _flush_and_join():
+    """Stop the cache writer at interpreter exit so no queued write is lost."""
+    _WRITE_Q.put(_WRITER_STOP)
+    _writer_thread.join()
+    with _cache_lock:
+        _cache_conn.commit()
+
+_writer_thread = threading.Thread(target=_writer_loop, name='ollama-cache-writer', daemon=True)
+_writer_thread.start()
+atexit.register(_flush_and_join)
+
+def _is_identifier_like(column_name: str) -> bool:
+    """Check whether a column name is code-like (has '_', a digit or an inner capital) rather than a plain word."""
+    return bool(re.search(r'[_\d]', column_name) or re.search(r'[A-Z]', column_name[1:]))
+
+def _get_column_cache_key(table_name: str, column_info: Dict[str, Any], sample_values: List[Any], model: str) -> str:
+    """
+    Build a cache key from a column's table, data type, nullability and sample values instead of the full prompt,
+    so identifier-like columns that differ only by name (e.g. 'StoreID' vs 'BranchID') share one cached description.
+    """
+    column_name = str(column_info['column_name'])
+    signature = [model, table_name, column_info['data_type'], column_info['is_nullable'], sorted(str(v) for v in sample_values)]
+    if not sample_values or not _is_identifier_like(column_name):
+        # A plain-word name can't be swapped safely out of prose, and with no samples
+        # the name is all the model had to go on; either way it stays part of the key.
+        signature.append(column_name)
+    return _get_cache_key(repr(signature))
+
+def _load_column_description(table_name: str, column_info: Dict[str, Any], sample_values: List[Any], model: str) -> Optional[str]:
+    """Load a cached column description, filling this column's name back in."""
+    cached_response = _load_from_cache(_get_column_cache_key(table_name, column_info, sample_values, model))
+    if not cached_response:
+        return None
+    return cached_response.replace(COLUMN_PLACEHOLDER, str(column_info['column_name']))
 
-def _save_to_cache(cache_key: str, response: Any):
-    """Save a response to the cache."""
-    cache_file = os.path.join(CACHE_DIR, f'{cache_key}.pkl')
-    with open(cache_file, 'wb') as f:
-        pickle.dump(response, f)
+def _save_column_description(table_name: str, column_info: Dict[str, Any], sample_values: List[Any], model: str, description: str):
+    """Cache a column description, with an identifier-like column name replaced by the placeholder outside field labels."""
+    column_name = str(column_info['column_name'])
+    if _is_identifier_like(column_name):
+        name_pattern = re.compile(rf'(?<!\w){re.escape(column_name)}(?!\w)')
+        # The split keeps '**Label**:' markers at odd indices; only the text between them is rewritten.
+        parts = _FIELD_LABEL_PATTERN.split(description)
+        parts[::2] = [name_pattern.sub(COLUMN_PLACEHOLDER, part) for part in parts[::2]]
+        description = ''.join(parts)
+    _save_to_cache(_get_column_cache_key(table_name, column_info, sample_values, model), description)
 
 def _parse_markdown_description(description: str) -> Dict[str, str]:
     """
     Parse the markdown description from the LLM into a structured dictionary.
     This version is more robust to variations in the LLM's output.
     """
-    patterns = {
-        'business_purpose': r'\*\*Business Purpose\*\*:\s*(.*?)(?=\n-|\n\n|$)',
-        'data_quality_rules': r'\*\*Data Quality Rules\*\*:\s*(.*?)(?=\n-|\n\n|$)',
-        'example_usage': r'\*\*Example Usage\*\*:\s*(.*?)(?=\n-|\n\n|$)',
-        # Handles both "Issues" and "Known Issues/Limitations" for flexibility
-        'issues': r'\*\*(?:Known Issues/Limitations|Issues)\*\*:\s*(.*?)(?=\n-|\n\n|$)'
-    }
     result = {}
-    for key, pattern in patterns.items():
-        match = re.search(pattern, description, re.DOTALL | re.IGNORECASE)
-        result[key] = match.group(1).strip() if match else 'N/A'
-    return result
+    for match in _SECTION_PATTERN.finditer(description):
+        key = _SECTION_KEYS[match.group(1).lower()]
+        if key not in result:
+            result[key] = match.group(2).strip()
+    return {key: result.get(key, 'N/A') for key in _SECTION_KEYS.values()}
+
+def _split_batch_response(response: str, expected: int) -> Optional[List[str]]:
+    """
+    Split a batched LLM response on its '## COLUMN <i>' headers.
+    Returns one markdown section per column in order, or None if any column is missing.
+    """
+    parts = _COLUMN_HEADER_PATTERN.split(response)
+    sections = {}
+    for index, body in zip(parts[1::2], parts[2::2]):
+        sections.setdefault(int(index), body.strip())
+    if any(i not in sections for i in range(1, expected + 1)):
+        return None
+    return [sections[i] for i in range(1, expected + 1)]
+
+def _first_distinct_values(series: pd.Series, k: int = 5) -> List[str]:
+    """
+    Return the first k distinct non-null values of a series as strings, stopping as soon as they are found.
+    Values longer than SAMPLE_VALUE_MAX_CHARS are shortened and marked with '...';
+    values are deduplicated after shortening.
+    """
+    non_null = series.dropna()
+    values: Dict[str, None] = {}
+    # Walk in slices so values are formatted from native Python types (like tolist())
+    # without materializing the whole column.
+    for start in range(0, len(non_null), SAMPLE_SCAN_ROWS):
+        for value in non_null.iloc[start:start + SAMPLE_SCAN_ROWS].tolist():
+            text = str(value)
+            if len(text) > SAMPLE_VALUE_MAX_CHARS:
+                text = text[:SAMPLE_VALUE_MAX_CHARS] + '...'
+            values[text] = None
+            if len(values) == k:
+                return list(values)
+    return list(values)
+
+def _read_csv_sample(csv_file_path: str, sample_rows: Optional[int]) -> pd.DataFrame:
+    """
+    Read up to sample_rows rows of a CSV into Arrow-backed columns, which are smaller than
+    NumPy/object columns and make the null and distinct-value scans cheaper.
+    Falls back to the default dtypes when pyarrow or a recent enough pandas (2.0+) is unavailable.
+    """
+    try:
+        return pd.read_csv(csv_file_path, nrows=sample_rows, dtype_backend='pyarrow')
+    except (ImportError, TypeError) as e:
+        logging.info(f"Arrow-backed dtypes unavailable ({e}); reading {csv_file_path} with default dtypes.")
+        return pd.read_csv(csv_file_path, nrows=sample_rows)
+
+def _dtype_name(dtype: Any) -> str:
+    """
+    Name a column's dtype as NumPy would, so Arrow-backed columns read as 'int64' rather than 'int64[pyarrow]'.
+    Arrow strings are reported as 'object', matching the default read; their numpy_dtype would give '<U0'.
+    """
+    # Checked by attribute rather than pd.ArrowDtype, which older pandas lacks
+    if hasattr(dtype, 'pyarrow_dtype'):
+        import pyarrow as pa  # Only reachable when pandas has read Arrow-backed columns
+        if pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype):
+            return 'object'
+        return str(dtype.numpy_dtype)
+    return str(dtype)
+
+def _load_checkpoint(checkpoint_path: str, csv_mtime: float, model: str) -> Dict[str, str]:
+    """Load checkpointed column descriptions if they were made from this version of the CSV with this model."""
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logging.warning(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+        return {}
+    if checkpoint.get('csv_mtime') != csv_mtime or checkpoint.get('model') != model:
+        return {}
+    return checkpoint.get('descriptions', {})
+
+def _save_checkpoint(checkpoint_path: str, csv_mtime: float, model: str, descriptions: Dict[str, str]):
+    """Write the checkpoint to a temporary file and rename it into place, so it is never left half-written."""
+    tmp_path = f'{checkpoint_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'csv_mtime': csv_mtime, 'model': model, 'descriptions': descriptions}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def _classify_column(column_info: Dict[str, Any], sample_values: List[Any]) -> Optional[str]:
+    """Return the TEMPLATES key for a trivially-describable column, or None if it needs the LLM."""
+    column_name = str(column_info['column_name'])
+    data_type = column_info['data_type']
+    if data_type in ('bool', 'boolean'):
+        return 'flag'
+    if _FLAG_NAME_PATTERN.match(column_name) and sample_values and all(
+        str(value).strip().lower() in _FLAG_VALUES for value in sample_values
+    ):
+        return 'flag'
+    if data_type.startswith('datetime64'):
+        return 'date'
+    if _DATE_NAME_PATTERN.search(column_name) and sample_values and all(
+        _ISO_DATE_PATTERN.match(value) for value in sample_values
+    ):
+        return 'date'
+    if _ID_NAME_PATTERN.search(column_name) and (data_type.startswith('int') or data_type in _STRING_DTYPES):
+        return 'identifier'
+    return None
+
+def _generate_templated_description(table_name: str, column_info: Dict[str, Any], template_key: str) -> str:
+    """Fill in the rule-based markdown description for a column."""
+    null_rule = 'may be null' if column_info['is_nullable'] == 'YES' else 'must not be null'
+    return TEMPLATES[template_key].format(
+        table_name=table_name,
+        column_name=column_info['column_name'],
+        data_type=column_info['data_type'],
+        null_rule=null_rule
+    )
+
+def _is_response_complete(text: str, expected_columns: int) -> bool:
+    """Check whether every expected column in a (partial) response has all four fields, each non-empty."""
+    if expected_columns == 1:
+        sections = [text]
+    else:
+        sections = _split_batch_response(text, expected_columns)
+        if sections is None:
+            return False
+    return all(
+        value and value != 'N/A'
+        for section in sections
+        for value in _parse_markdown_description(section).values()
+    )
+
+@functools.lru_cache(maxsize=None)
+def _get_ollama_client() -> ollama.Client:
+    """Return the shared Ollama client so every request reuses its keep-alive HTTP connections."""
+    return ollama.Client()
+
+def _chat_with_ollama(prompt: str, model: str, expected_columns: int = 1) -> str:
+    """
+    Stream a chat response from Ollama and return its text.
+    Generation is cut short once all fields of every expected column have been closed,
+    so the model's trailing commentary is never waited on.
+    """
+    stream = _get_ollama_client().chat(
+        model=model,
+        messages=[{'role': 'user', 'content': prompt}],
+        options={'temperature': 0.2},
+        stream=True
+    )
+    buffer = ''
+    for chunk in stream:
+        content = chunk['message']['content']
+        buffer += content
+        if '\n' not in content:
+            continue
+        # Only text before the last blank line is settled; a field at the very end may still be growing.
+        # The full buffer is kept when stopping, so a field that continues past the blank line is not cut.
+        settled_end = buffer.rfind('\n\n')
+        if settled_end > 0 and _is_response_complete(buffer[:settled_end], expected_columns):
+            logging.info("All fields received; stopping generation early.")
+            break
+    return buffer.strip()
+
+def _has_parsed_fields(description: str) -> bool:
+    """Check whether at least one field could be parsed out of a description."""
+    return any(value != 'N/A' for value in _parse_markdown_description(description).values())
+
+def _fallback_description(table_name: str, column_info: Dict[str, Any], error: Exception) -> str:
+    """Build a placeholder description used when the LLM call fails."""
+    return (
+        f"- **Business Purpose**: Could not determine purpose for {column_info['column_name']}.\n"
+        f"- **Data Quality Rules**: Must conform to data type {column_info['data_type']}.\n"
+        f"- **Example Usage**: Used for general analysis within the {table_name} table.\n"
+        f"- **Known Issues/Limitations**: {FALLBACK_MARKER}: {error}"
+    )
 
 def _generate_description_with_ollama(
     table_name: str, 
     column_info: Dict[str, Any], 
-    sample_values: List[Any],
+    sample_values: List[str],
     model: str
 ) -> str:
     """
@@ -71,7 +445,7 @@ def _generate_description_with_ollama(
     Data Type: {column_info['data_type']}
     Is Nullable: {column_info['is_nullable']}
     
-    Here are a few sample values from the column: {sample_values}
+    Here are a few sample values from the column: {', '.join(sample_values)}
     
     Please provide the following information in markdown format:
     - **Business Purpose**: Briefly describe the column's role in business processes (1 clear sentence).
@@ -82,89 +456,225 @@ def _generate_description_with_ollama(
     Keep the total response under 200 words.
     """
     
-    cache_key = _get_cache_key(prompt)
-    cached_response = _load_from_cache(cache_key)
+    cached_response = _load_column_description(table_name, column_info, sample_values, model)
     if cached_response:
         logging.info(f"CACHE HIT: Retrieved description for {column_info['column_name']} in {table_name}")
         return cached_response
 
     logging.info(f"CACHE MISS: Generating description for {column_info['column_name']} in {table_name} using '{model}'...")
     try:
-        # Initialize the Ollama client
-        client = ollama.Client()
-        response = client.chat(
-            model=model,
-            messages=[{'role': 'user', 'content': prompt}],
-            options={'temperature': 0.2}
-        )
-        description = response['message']['content'].strip()
-        _save_to_cache(cache_key, description)
+        description = _chat_with_ollama(prompt, model)
+        if not _has_parsed_fields(description):
+            logging.warning(f"No fields could be parsed for {column_info['column_name']}; not caching the response.")
+            return description
+        _save_column_description(table_name, column_info, sample_values, model, description)
         logging.info(f"SUCCESS: Generated and cached description for {column_info['column_name']}")
         return description
     
     except Exception as e:
         logging.error(f"Error generating description for {column_info['column_name']}: {e}")
-        fallback = (
-            f"- **Business Purpose**: Could not determine purpose for {column_info['column_name']}.\n"
-            f"- **Data Quality Rules**: Must conform to data type {column_info['data_type']}.\n"
-            f"- **Example Usage**: Used for general analysis within the {table_name} table.\n"
-            f"- **Known Issues/Limitations**: LLM description generation failed: {e}"
+        return _fallback_description(table_name, column_info, e)
+
+def _generate_batch_descriptions_with_ollama(
+    table_name: str,
+    columns: List[Tuple[Dict[str, Any], List[Any]]],
+    model: str
+) -> List[str]:
+    """
+    Generate descriptions for several columns with a single Ollama call.
+    If the response cannot be split into one section per column, or a section has
+    no parsable fields, the batch is halved and retried, down to the single-column prompt.
+    """
+    if len(columns) == 1:
+        column_info, sample_values = columns[0]
+        return [_generate_description_with_ollama(table_name, column_info, sample_values, model)]
+
+    descriptions = [
+        _load_column_description(table_name, column_info, sample_values, model)
+        for column_info, sample_values in columns
+    ]
+    missing = [i for i, description in enumerate(descriptions) if description is None]
+    if len(missing) < len(columns):
+        logging.info(f"CACHE HIT: Retrieved {len(columns) - len(missing)} of {len(columns)} descriptions in {table_name}")
+        if missing:
+            generated = _generate_batch_descriptions_with_ollama(table_name, [columns[i] for i in missing], model)
+            for i, description in zip(missing, generated):
+                descriptions[i] = description
+        return descriptions
+
+    column_blocks = "\n".join(
+        f"""
+    ### COLUMN {i}: {column_info['column_name']}
+    Data Type: {column_info['data_type']}
+    Is Nullable: {column_info['is_nullable']}
+    Sample Values: {', '.join(sample_values)}"""
+        for i, (column_info, sample_values) in enumerate(columns, start=1)
+    )
+    prompt = f"""
+    As a data governance expert, provide a concise description for each of the following database columns:
+    
+    Table: {table_name}
+    {column_blocks}
+    
+    For each column, start a new section with the header '## COLUMN <number>' (using the column numbers above)
+    and provide the following information in markdown format:
+    - **Business Purpose**: Briefly describe the column's role in business processes (1 clear sentence).
+    - **Data Quality Rules**: List 1-2 critical rules to ensure data integrity (e.g., format, range, uniqueness).
+    - **Example Usage**: Provide one practical example of how this column is used in analysis or operations.
+    - **Known Issues/Limitations**: Identify 1-2 potential data quality issues or limitations.
+    
+    Keep each column's response under 200 words.
+    """
+    column_names = ', '.join(column_info['column_name'] for column_info, _ in columns)
+
+    logging.info(f"CACHE MISS: Generating descriptions for [{column_names}] in {table_name} using '{model}'...")
+    try:
+        description = _chat_with_ollama(prompt, model, expected_columns=len(columns))
+    except Exception as e:
+        logging.error(f"Error generating descriptions for [{column_names}]: {e}")
+        return [_fallback_description(table_name, column_info, e) for column_info, _ in columns]
+
+    sections = _split_batch_response(description, len(columns))
+    if sections is None or not all(_has_parsed_fields(section) for section in sections):
+        logging.warning(f"Could not parse batched response for [{column_names}]; retrying in smaller batches.")
+        middle = len(columns) // 2
+        return (
+            _generate_batch_descriptions_with_ollama(table_name, columns[:middle], model)
+            + _generate_batch_descriptions_with_ollama(table_name, columns[middle:], model)
         )
-        return fallback
+
+    for (column_info, sample_values), section in zip(columns, sections):
+        _save_column_description(table_name, column_info, sample_values, model, section)
+    logging.info(f"SUCCESS: Generated and cached descriptions for [{column_names}]")
+    return sections
 
 # --- Main Function ---
 
-def generate_descriptions_from_csv(csv_file_path: str, model: str = 'llama3') -> Dict[str, List[Dict[str, Any]]]:
+def generate_descriptions_from_csv(
+    csv_file_path: str,
+    model: str = 'llama3',
+    sample_rows: Optional[int] = READ_SAMPLE_ROWS
+) -> Dict[str, List[Dict[str, Any]]]:
     """
     Reads a CSV file, analyzes its columns, and generates structured descriptions using a local Ollama model.
 
     Args:
         csv_file_path (str): The full path to the input CSV file.
         model (str, optional): The name of the Ollama model to use. Defaults to 'llama3'.
+        sample_rows (int, optional): Number of rows read to infer dtypes, nullability and sample values.
+            Defaults to READ_SAMPLE_ROWS; None reads the entire file for exact nullability.
 
     Returns:
         Dict[str, List[Dict[str, Any]]]: A dictionary where the key is the table name (derived from the
         CSV filename) and the value is a list of dictionaries, each describing a column.
     """
-    if not os.path.exists(csv_file_path):
-        logging.error(f"File not found: {csv_file_path}")
-        return {}
-
     try:
-        df = pd.read_csv(csv_file_path)
+        df = _read_csv_sample(csv_file_path, sample_rows)
         # Derive table name from the filename (e.g., 'sales_data.csv' -> 'sales_data')
         table_name = os.path.splitext(os.path.basename(csv_file_path))[0]
         logging.info(f"Processing table '{table_name}' with {len(df.columns)} columns.")
+        if sample_rows is not None and len(df) >= sample_rows:
+            logging.warning(
+                f"Only the first {sample_rows} rows of {csv_file_path} were read; "
+                f"data types and nullability are estimated from this sample."
+            )
 
-        all_column_info = []
+        # 1. Gather metadata directly from the DataFrame, computing dtypes and
+        #    nullability for all columns at once
+        dtypes_map = {c: _dtype_name(t) for c, t in df.dtypes.items()}
+        nulls_map = df.isna().any().to_dict()
+        head_df = df.head(SAMPLE_SCAN_ROWS)
+
+        columns = []
         for column_name in df.columns:
-            # 1. Gather metadata directly from the DataFrame
             column_info_metadata = {
                 'column_name': column_name,
-                'data_type': str(df[column_name].dtype),
-                'is_nullable': 'YES' if df[column_name].isnull().any() else 'NO'
+                'data_type': dtypes_map[column_name],
+                'is_nullable': 'YES' if nulls_map[column_name] else 'NO'
+            }
+            sample_values = _first_distinct_values(head_df[column_name])
+            if not sample_values and nulls_map[column_name]:
+                # Leading rows were all null; look further into the column
+                sample_values = _first_distinct_values(df[column_name])
+            columns.append((column_info_metadata, sample_values))
+
+        # 2. Pick up columns already described by an interrupted run on this same file
+        checkpoint_path = os.path.join(CACHE_DIR, f'{table_name}.partial.json')
+        csv_mtime = os.path.getmtime(csv_file_path)
+        checkpoint = _load_checkpoint(checkpoint_path, csv_mtime, model)
+        if checkpoint:
+            logging.info(f"CHECKPOINT: Resuming '{table_name}' with {len(checkpoint)} columns already described.")
+
+        # 3. Describe identifier, date and flag columns from templates; everything else goes to the LLM
+        descriptions: List[Optional[str]] = [None] * len(columns)
+        llm_indices = []
+        for i, (column_info_metadata, sample_values) in enumerate(columns):
+            if column_info_metadata['column_name'] in checkpoint:
+                descriptions[i] = checkpoint[column_info_metadata['column_name']]
+                continue
+            template_key = _classify_column(column_info_metadata, sample_values)
+            if template_key:
+                logging.info(f"TEMPLATE: Described {column_info_metadata['column_name']} in {table_name} as '{template_key}'")
+                descriptions[i] = _generate_templated_description(table_name, column_info_metadata, template_key)
+            else:
+                llm_indices.append(i)
+
+        # 4. Generate the remaining descriptions using the LLM, several columns per call and
+        #    several calls in flight. Each future maps back to its batch's offset to keep column
+        #    order, and the checkpoint is rewritten as soon as any batch completes.
+        llm_columns = [columns[i] for i in llm_indices]
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(_generate_batch_descriptions_with_ollama, table_name, llm_columns[start:start + BATCH_SIZE], model): start
+                for start in range(0, len(llm_columns), BATCH_SIZE)
             }
-            sample_values = df[column_name].dropna().unique().tolist()[:5]
+            try:
+                for future in as_completed(futures):
+                    start = futures[future]
+                    for i, description_md in zip(llm_indices[start:start + BATCH_SIZE], future.result()):
+                        descriptions[i] = description_md
+                        if FALLBACK_MARKER not in description_md:
+                            checkpoint[columns[i][0]['column_name']] = description_md
+                    _save_checkpoint(checkpoint_path, csv_mtime, model, checkpoint)
+            except BaseException:
+                # On Ctrl-C (or any failure) drop the batches not yet started instead of
+                # running them all before the interrupt propagates.
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
 
-            # 2. Generate the description using the LLM
-            description_md = _generate_description_with_ollama(table_name, column_info_metadata, sample_values, model)
+        all_column_info = []
+        for (column_info_metadata, _), description_md in zip(columns, descriptions):
+            column_name = column_info_metadata['column_name']
 
-            # 3. Parse the markdown into a structured dictionary
+            # 5. Parse the markdown into a structured dictionary
             parsed_desc = _parse_markdown_description(description_md)
             
-            # 4. Format the final output structure
+            # 6. Format the final output structure
             final_column_structure = {
                 'column_name': column_name,
                 'column_desc': [parsed_desc] # Nested as per your original code's implied structure
             }
             all_column_info.append(final_column_structure)
+
+        # The table is complete, so the checkpoint is no longer needed
+        try:
+            os.remove(checkpoint_path)
+        except FileNotFoundError:
+            pass
         
         return {table_name: all_column_info}
 
+    except FileNotFoundError:
+        logging.error(f"File not found: {csv_file_path}")
+        return {}
+
     except Exception as e:
         logging.error(f"An error occurred while processing {csv_file_path}: {e}")
         return {}
 
+    finally:
+        _flush_cache()
+
 # --- Example Usage ---
 if __name__ == '__main__':
     # Create a dummy CSV file for demonstration purposes
@@ -186,6 +696,5 @@ if __name__ == '__main__':
     generated_descriptions = generate_descriptions_from_csv(file_path, model='llama3')
     
     # Pretty-print the result
-    import json
     print("\n--- Generated Column Descriptions ---")
     print(json.dumps(generated_descriptions, indent=2))
\ No newline at end of file